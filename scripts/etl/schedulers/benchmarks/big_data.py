@@ -0,0 +1,91 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR mo_http.big_data LINE SPLITTING AND DECOMPRESSION
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/big_data.py --megabytes=100 --line=10000000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+import resource
+from time import time
+
+from mo_http.big_data import ibytes2ilines, icompressed2ibytes, ibytes2icompressed, ilines2ivalues
+from mo_logs import startup, Log
+from mo_threads import stop_main_thread
+
+BLOCK_SIZE = 4096  # SMALL BLOCKS, LIKE FROM A NETWORK STREAM
+
+
+def blocks(data):
+    for i in range(0, len(data), BLOCK_SIZE):
+        yield data[i: i + BLOCK_SIZE]
+
+
+def report(name, megabytes, start, num):
+    duration = time() - start
+    Log.note(
+        "{{name}}: {{num}} lines in {{seconds|round(places=2)}}s ({{rate|round(places=1)}} MB/s), peak memory {{memory}}MB",
+        name=name,
+        num=num,
+        seconds=duration,
+        rate=megabytes / duration,
+        memory=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1000,
+    )
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [
+                {"name": "--megabytes", "type": int, "default": 100, "dest": "megabytes"},
+                {"name": "--line", "type": int, "default": 10 * 1000 * 1000, "dest": "line", "help": "bytes in the long line"},
+            ]
+        )
+        Log.start()
+
+        # MANY SHORT JSON LINES
+        record = b'{"push": {"id": %d, "date": 1590000000}, "branch": "autoland", "tasks": ["a", "b", "c"]}'
+        lines = []
+        size = 0
+        while size < settings.megabytes * 1000 * 1000:
+            line = record % len(lines)
+            lines.append(line)
+            size += len(line) + 1
+        data = b"\n".join(lines)
+        del lines
+        compressed = b"".join(ibytes2icompressed(blocks(data)))
+        megabytes = len(data) / 1000 / 1000
+
+        start = time()
+        num = sum(1 for _ in ibytes2ilines(blocks(data)))
+        report("split", megabytes, start, num)
+
+        start = time()
+        num = sum(1 for _ in ibytes2ilines(icompressed2ibytes(blocks(compressed))))
+        report("decompress and split", megabytes, start, num)
+
+        start = time()
+        num = sum(1 for _ in ilines2ivalues(ibytes2ilines(icompressed2ibytes(blocks(compressed)))))
+        report("decompress, split and decode", megabytes, start, num)
+
+        # ONE LONG LINE, SPANNING MANY BLOCKS
+        data = b"x" * settings.line + b"\n"
+        start = time()
+        num = sum(1 for _ in ibytes2ilines(blocks(data), encoding=None))
+        report("long line", len(data) / 1000 / 1000, start, num)
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
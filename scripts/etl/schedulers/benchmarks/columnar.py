@@ -0,0 +1,203 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+DIFFERENTIAL CHECK, AND BENCHMARK, OF THE COLUMNAR (numpy) list_aggs() AGAINST
+THE ROW-BY-ROW ENGINE, AND OF THE numpy mo_math.stats.percentile()/median()
+AGAINST sorted().  ANY DIFFERENCE (IN VALUE OR TYPE) IS AN ERROR.
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/columnar.py --num=200000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from jx_base.query import QueryOp
+from jx_python.containers.list_usingPythonList import ListContainer
+from jx_python.lists import columnar
+from mo_logs import startup, Log
+from mo_math import stats
+from mo_math.randoms import Random
+from mo_threads import stop_main_thread
+from mo_times import Timer
+
+BRANCHES = ["autoland", "mozilla-central", "try", None]
+PLATFORMS = ["linux64", "windows10-64", "macosx1014-64", "android-em-7.0-x86_64", None]
+SCHEDULERS = ["bugbug_tasks_medium", "bugbug_tasks_high", "relevant_tasks"]
+
+SELECTS = [
+    {"name": "rows", "aggregate": "count"},
+    {"name": "pushes", "value": "push.id", "aggregate": "count"},
+    {"name": "tasks", "value": "tasks", "aggregate": "sum"},
+    {"name": "duration", "value": "duration", "aggregate": "sum"},
+    {"name": "mixed", "value": "mixed", "aggregate": "sum"},
+    {"name": "average", "value": "duration", "aggregate": "average"},
+    {"name": "mixed_average", "value": "mixed", "aggregate": "avg"},
+    {"name": "first", "value": "push.id", "aggregate": "min"},
+    {"name": "last", "value": "push.id", "aggregate": "max"},
+    {"name": "mixed_min", "value": "mixed", "aggregate": "min"},
+    {"name": "mixed_max", "value": "mixed", "aggregate": "max"},
+    {"name": "median", "value": "duration", "aggregate": "median"},
+    {"name": "p90", "value": "duration", "aggregate": "percentile", "percentile": 0.9},
+    {"name": "mixed_p10", "value": "mixed", "aggregate": "percentile", "percentile": 0.1},
+]
+
+QUERIES = [
+    {"edges": ["branch"], "select": SELECTS},
+    {"edges": ["branch", "platform", "scheduler"], "select": SELECTS},
+    {"edges": ["tasks"], "select": SELECTS},
+    {
+        "edges": ["branch", "scheduler"],
+        "select": SELECTS,
+        "where": {"and": [{"exists": "duration"}, {"gt": {"tasks": 10}}]},
+    },
+    {
+        "edges": [
+            {
+                "name": "branch",
+                "value": "branch",
+                "allowNulls": False,
+                "domain": {"type": "set", "partitions": ["autoland", "try"]},
+            }
+        ],
+        "select": SELECTS,
+    },
+    # NOT COLUMNAR, MUST FALL BACK
+    {"edges": ["branch"], "select": [{"name": "labels", "value": "label", "aggregate": "list"}]},
+]
+
+
+def make_rows(num):
+    output = []
+    for i in range(num):
+        row = {
+            "branch": Random.sample(BRANCHES, 1)[0],
+            "platform": Random.sample(PLATFORMS, 1)[0],
+            "scheduler": Random.sample(SCHEDULERS, 1)[0],
+            "push": {"id": Random.int(num // 10 + 1)},
+            "tasks": Random.int(200),
+            "label": "test-" + str(Random.int(100)),
+        }
+        if Random.int(10):
+            row["duration"] = Random.float(1000)
+        if Random.int(3):
+            row["mixed"] = Random.int(100) if Random.int(2) else Random.int(100) / 4
+        output.append(row)
+    return output
+
+
+def wrap_query(container, query):
+    return QueryOp.wrap(dict(query, **{"from": container.name}), container, container.namespace)
+
+
+def compare(path, expected, actual):
+    """
+    :return: LIST OF DIFFERENCES
+    """
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [(path, len(expected), len(actual))]
+        output = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            output.extend(compare(path + [i], e, a))
+        return output
+    if expected.__class__ is not actual.__class__ or expected != actual:
+        return [(path, expected, actual)]
+    return []
+
+
+def check_aggs(rows):
+    container = ListContainer("rows", rows)
+    for i, query in enumerate(QUERIES):
+        slow_query, fast_query = wrap_query(container, query), wrap_query(container, query)
+        columnar.ENABLED = False
+        with Timer("query {{i}} row-by-row", {"i": i}) as slow:
+            expected = container.query(slow_query)
+        columnar.ENABLED = True
+        with Timer("query {{i}} columnar", {"i": i}) as fast:
+            actual = container.query(fast_query)
+
+        differences = []
+        for e, a in zip(expected.edges, actual.edges):
+            differences.extend(compare([e.name, "partitions"], [p.value for p in e.domain.partitions], [p.value for p in a.domain.partitions]))
+            differences.extend(compare([e.name, "allowNulls"], e.allowNulls, a.allowNulls))
+        for name, m in expected.data.items():
+            differences.extend(compare([name], m.cube, actual.data[name].cube))
+        if differences:
+            Log.error("query {{i}} is different: {{differences|json}}", i=i, differences=differences[:10])
+        Log.note(
+            "query {{i}} is identical ({{mode}}), {{speedup|round(places=2)}}x faster",
+            i=i,
+            mode="columnar" if columnar.columnar_aggs(rows, wrap_query(container, query)) else "fallback",
+            speedup=slow.interval / fast.interval,
+        )
+
+
+def time_percentiles(i, values):
+    """
+    :return: SECONDS FOR ALL percentile() CALLS, WITH sorted() AND WITH numpy
+    """
+    slow, fast = 0, 0
+    for percent in [0, 0.1, 0.5, 0.9, 1]:
+        stats.numpy, numpy = None, stats.numpy
+        with Timer("percentile with sorted()", silent=True) as timer:
+            expected = stats.percentile(values, percent)
+        slow += timer.interval
+        stats.numpy = numpy
+        with Timer("percentile with numpy", silent=True) as timer:
+            actual = stats.percentile(values, percent)
+        fast += timer.interval
+        if compare([], expected, actual):
+            Log.error("percentile({{percent}}) of sample {{i}} is different: {{expected}} != {{actual}}", i=i, percent=percent, expected=expected, actual=actual)
+    return slow, fast
+
+
+def check_stats(num):
+    samples = [
+        [Random.float(1000) for _ in range(num)],
+        [Random.int(1000) for _ in range(num)],
+        [Random.int(10) for _ in range(num)],
+    ]
+    for i, values in enumerate(samples):
+        slow, fast = time_percentiles(i, values)
+        array_slow, array_fast = time_percentiles(i, stats.numpy.array(values))
+        stats.numpy, numpy = None, stats.numpy
+        expected = stats.median(values)
+        stats.numpy = numpy
+        actual = stats.median(values)
+        if compare([], expected, actual):
+            Log.error("median of sample {{i}} is different: {{expected}} != {{actual}}", i=i, expected=expected, actual=actual)
+        Log.note(
+            "stats of sample {{i}} are identical, percentile {{speedup|round(places=2)}}x faster on list, {{array_speedup|round(places=2)}}x on ndarray",
+            i=i,
+            speedup=slow / fast,
+            array_speedup=array_slow / array_fast,
+        )
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [{"name": "--num", "type": int, "default": 200000, "dest": "num"}]
+        )
+        Log.start()
+        if not columnar.ENABLED:
+            Log.error("numpy is required to compare the columnar engine")
+        columnar.MIN_ROWS = 0
+        rows = make_rows(settings.num)
+        check_aggs(rows)
+        check_aggs(rows[:50])  # SMALL, WITH EMPTY CELLS
+        check_stats(settings.num)
+    finally:
+        columnar.ENABLED = columnar.numpy is not None
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
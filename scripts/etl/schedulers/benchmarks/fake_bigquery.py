@@ -0,0 +1,198 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+IN-PROCESS STAND-IN FOR google.cloud.bigquery.Client, ENOUGH FOR jx_bigquery
+TO CREATE TABLES AND VIEWS, INSERT ROWS, AND MERGE SHARDS, WITHOUT A NETWORK
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+import json
+import re
+from itertools import count
+
+from mo_future import is_text
+from mo_logs import Log
+from mo_threads import Lock, Till
+
+CREATE_VIEW = re.compile(r"^\s*CREATE\s+VIEW\s+(\S+)\s+AS\s+(.*)$", re.DOTALL | re.IGNORECASE)
+INSERT_INTO = re.compile(r"^\s*INSERT\s+INTO\s+(\S+)", re.IGNORECASE)
+FROM = re.compile(r"\bFROM\s+(\S+)", re.IGNORECASE)
+
+
+class FakeDataset(object):
+    def __init__(self, project, dataset_id):
+        self.project = project
+        self.dataset_id = dataset_id
+
+    @property
+    def reference(self):
+        return self
+
+
+class FakeTable(object):
+    """
+    THE PARTS OF bigquery.Table THAT jx_bigquery USES, PLUS THE ROWS
+    """
+
+    def __init__(self, project, dataset_id, table_id, schema=(), table_type="TABLE", view_query=None):
+        self.project = project
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.schema = list(schema)
+        self.table_type = table_type
+        self.view_query = view_query
+        self.time_partitioning = None
+        self.clustering_fields = None
+        self.rows = []
+
+    @property
+    def reference(self):
+        return self
+
+    @property
+    def num_rows(self):
+        return len(self.rows)
+
+
+class FakeJob(object):
+    def __init__(self, job_id, rows=(), total_bytes_processed=0, errors=None):
+        self.job_id = job_id
+        self.state = "DONE"
+        self.errors = errors
+        self.total_bytes_processed = total_bytes_processed
+        self.rows = list(rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def result(self):
+        return self
+
+
+class FakeClient(object):
+    """
+    :param latency: SECONDS TO WAIT PER REQUEST, TO MIMIC THE NETWORK
+    """
+
+    def __init__(self, project="replay", latency=0):
+        self.project = project
+        self.latency = latency
+        self.lock = Lock("fake bigquery")
+        self.datasets = {}  # FROM dataset_id TO FakeDataset
+        self.tables = {}  # FROM (dataset_id, table_id) TO FakeTable
+        self.jobs = {}  # FROM job_id TO FakeJob
+        self.job_ids = count()
+        self.inserts = 0  # NUMBER OF insert_rows_json() REQUESTS
+        self.rows = 0  # NUMBER OF ROWS INSERTED
+        self.bytes = 0  # JSON BYTES INSERTED
+        self.queries = 0
+
+    def _wait(self):
+        if self.latency:
+            Till(seconds=self.latency).wait()
+
+    def list_datasets(self):
+        with self.lock:
+            return list(self.datasets.values())
+
+    def create_dataset(self, dataset):
+        with self.lock:
+            output = self.datasets[dataset.dataset_id] = FakeDataset(self.project, dataset.dataset_id)
+        return output
+
+    def list_tables(self, dataset):
+        with self.lock:
+            return [t for (d, _), t in self.tables.items() if d == dataset.dataset_id]
+
+    def get_table(self, table):
+        key = _key(table)
+        with self.lock:
+            output = self.tables.get(key)
+        if output is None:
+            Log.error("Not found: Table {{table}}", table=".".join(key))
+        return output
+
+    def create_table(self, table):
+        output = FakeTable(self.project, table.dataset_id, table.table_id, table.schema)
+        output.time_partitioning = table.time_partitioning
+        output.clustering_fields = table.clustering_fields
+        with self.lock:
+            self.tables[_key(output)] = output
+        return output
+
+    def delete_table(self, table):
+        with self.lock:
+            self.tables.pop(_key(table), None)
+
+    def insert_rows_json(self, table, json_rows, row_ids=None, skip_invalid_rows=False, ignore_unknown_values=False):
+        # THE REAL CLIENT SERIALIZES THE REQUEST; SO DO WE
+        payload = json.dumps({"rows": [{"json": r} for r in json_rows]})
+        self._wait()
+        target = self.get_table(table)
+        with self.lock:
+            target.rows.extend(json_rows)
+            self.inserts += 1
+            self.rows += len(json_rows)
+            self.bytes += len(payload)
+        return []
+
+    def query(self, sql, job_config=None):
+        """
+        UNDERSTANDS CREATE VIEW AND INSERT INTO ... SELECT; ALL OTHER QUERIES RETURN NO ROWS
+        """
+        self._wait()
+        with self.lock:
+            self.queries += 1
+            job_id = "replay_" + str(next(self.job_ids))
+
+        sources = [self.tables.get(_key(n)) for n in FROM.findall(sql)]
+        sources = [s for s in sources if s is not None]
+        if job_config is not None and getattr(job_config, "dry_run", False):
+            job = FakeJob(job_id, total_bytes_processed=sum(len(json.dumps(s.rows)) for s in sources))
+        else:
+            job = FakeJob(job_id)
+            view = CREATE_VIEW.match(sql)
+            insert = INSERT_INTO.match(sql)
+            if view:
+                dataset_id, table_id = _key(view.group(1))
+                table = FakeTable(
+                    self.project,
+                    dataset_id,
+                    table_id,
+                    schema=sources[0].schema if sources else (),
+                    table_type="VIEW",
+                    view_query=view.group(2).strip(),
+                )
+                with self.lock:
+                    self.tables[(dataset_id, table_id)] = table
+            elif insert:
+                target = self.tables.get(_key(insert.group(1)))
+                if target is None:
+                    job.errors = [{"message": "Not found: Table " + insert.group(1)}]
+                else:
+                    with self.lock:
+                        for s in sources:
+                            target.rows.extend(s.rows)
+        with self.lock:
+            self.jobs[job_id] = job
+        return job
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs[job_id]
+
+
+def _key(table):
+    """
+    :return: (dataset_id, table_id) FOR A TABLE, OR A (QUOTED) FULL NAME
+    """
+    if is_text(table):
+        return tuple(table.replace("`", "").split(".")[-2:])
+    return table.dataset_id, table.table_id
@@ -0,0 +1,171 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+PUSH FIXTURES: RECORD THEM FROM mozci, OR SYNTHESIZE THEM, AND REPLAY THEM
+AS PUSH OBJECTS WITH THE SAME ATTRIBUTES main.py USES
+
+ONE PUSH PER LINE:
+    {"branch", "id", "date", "revs", "backedoutby", "scheduled_task_labels",
+     "shadow_scheduler_tasks": {scheduler: [label]}, "regressions": [label]}
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from bisect import bisect_left
+
+from mo_dots import Data
+from mo_files import File
+from mo_json import json2value, value2json
+from mo_logs import Log
+from mo_math.randoms import Random
+from mo_times import Date
+
+SCHEDULERS = ["bugbug_tasks_medium", "bugbug_tasks_high", "relevant_tasks", "bugbug_reduced"]
+PLATFORMS = ["linux64", "linux64-asan", "windows10-64", "windows7-32", "macosx1014-64", "android-em-7.0-x86_64"]
+SUITES = ["mochitest-browser-chrome", "mochitest-plain", "xpcshell", "reftest", "web-platform-tests", "talos-g4", "gtest"]
+
+
+class FakePush(object):
+    def __init__(self, push):
+        self.id = push.id
+        self.date = push.date
+        self.revs = list(push.revs)
+        self.backedoutby = push.backedoutby or None
+        self.scheduled_task_labels = list(push.scheduled_task_labels)
+        self._tasks = {
+            name: None if tasks == None else list(tasks)
+            for name, tasks in push.shadow_scheduler_tasks.items()
+        }
+        self._regressions = list(push.regressions)
+
+    def get_shadow_scheduler_tasks(self, name):
+        tasks = self._tasks.get(name)
+        if tasks is None:
+            Log.error("no tasks for scheduler {{name}}", name=name)
+        return set(tasks)
+
+    def get_regressions(self, option):
+        return {label: 0 for label in self._regressions}
+
+
+class Fixture(object):
+    """
+    PUSHES, BY BRANCH, IN DATE ORDER; A STAND-IN FOR mozci.push.make_push_objects()
+    """
+
+    def __init__(self, pushes):
+        self.branches = {}
+        for p in sorted(pushes, key=lambda p: (p.date, p.id)):
+            self.branches.setdefault(p.branch, []).append(FakePush(p))
+        self.dates = {b: [p.date for p in pushes] for b, pushes in self.branches.items()}
+
+    def __len__(self):
+        return sum(len(v) for v in self.branches.values())
+
+    def make_push_objects(self, from_date, to_date, branch):
+        pushes = self.branches.get(branch, [])
+        dates = self.dates.get(branch, [])
+        start = bisect_left(dates, Date(from_date).unix)
+        end = bisect_left(dates, Date(to_date).unix)
+        return pushes[start:end]
+
+
+def synthesize(branches, start, end, num, tasks=200):
+    """
+    :param branches: LIST OF BRANCH NAMES
+    :param start: FIRST PUSH DATE
+    :param end: LAST PUSH DATE
+    :param num: NUMBER OF PUSHES, PER BRANCH
+    :param tasks: TYPICAL NUMBER OF TASKS SCHEDULED PER PUSH
+    :return: LIST OF PUSH FIXTURES
+    """
+    labels = [
+        "test-" + platform + "/opt-" + suite + "-e10s-" + str(chunk)
+        for platform in PLATFORMS
+        for suite in SUITES
+        for chunk in range(1, 20)
+    ]
+    start = Date(start).unix
+    end = Date(end).unix
+    output = []
+    for branch in branches:
+        for i in range(num):
+            scheduled = sorted(set(Random.sample(labels, Random.int(tasks * 2) + 1)))
+            output.append(
+                Data(
+                    branch=branch,
+                    id=len(output) + 1,
+                    date=int(start + (end - start) * i / num),
+                    revs=[Random.hex(40) for _ in range(Random.int(4) + 1)],
+                    backedoutby=Random.hex(40) if Random.int(20) == 0 else None,
+                    scheduled_task_labels=scheduled
+                    + ["shadow-scheduler-" + s for s in SCHEDULERS],
+                    shadow_scheduler_tasks={
+                        s: sorted(set(Random.sample(scheduled, Random.int(len(scheduled)) + 1)))
+                        for s in SCHEDULERS
+                    },
+                    regressions=sorted(set(Random.sample(scheduled, Random.int(4)))),
+                )
+            )
+    return output
+
+
+def record(make_push_objects, branches, start, end, interval):
+    """
+    READ THE PUSHES FROM mozci, ONE interval AT A TIME
+    :return: LIST OF PUSH FIXTURES
+    """
+    output = []
+    for branch in branches:
+        t = Date(start)
+        while t < end:
+            for push in make_push_objects(
+                from_date=t.format(), to_date=(t + interval).format(), branch=branch
+            ):
+                try:
+                    labels = list(push.scheduled_task_labels)
+                except Exception as e:
+                    Log.warning("could not get labels for {{push}}", push=push.id, cause=e)
+                    labels = []
+                tasks = {}
+                for label in labels:
+                    if "shadow-scheduler" not in label:
+                        continue
+                    name = label.split("shadow-scheduler-")[1]
+                    try:
+                        tasks[name] = sorted(push.get_shadow_scheduler_tasks(name))
+                    except Exception:
+                        tasks[name] = None
+                try:
+                    regressions = sorted(push.get_regressions("label").keys())
+                except Exception:
+                    regressions = []
+                output.append(
+                    {
+                        "branch": branch,
+                        "id": push.id,
+                        "date": push.date,
+                        "revs": push.revs,
+                        "backedoutby": push.backedoutby,
+                        "scheduled_task_labels": labels,
+                        "shadow_scheduler_tasks": tasks,
+                        "regressions": regressions,
+                    }
+                )
+            t = t + interval
+        Log.note("recorded {{num}} pushes on {{branch}}", num=len(output), branch=branch)
+    return output
+
+
+def write(filename, pushes):
+    File(filename).write("\n".join(value2json(p) for p in pushes))
+
+
+def read(filename):
+    return [json2value(line) for line in File(filename).read_lines() if line.strip()]
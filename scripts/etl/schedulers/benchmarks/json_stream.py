@@ -0,0 +1,96 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR mo_json.stream.parse() ON A LARGE, ActiveData-LIKE, RESPONSE
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/json_stream.py --megabytes=300
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+import resource
+from time import time
+
+from mo_json import stream, value2json
+from mo_logs import startup, Log
+from mo_threads import stop_main_thread
+
+READ_SIZE = 64 * 1024
+
+
+def response(megabytes):
+    """
+    :return: GENERATOR OF BYTES, ONE RECORD PER CHUNK
+    """
+    yield b'{"meta": {"format": "list", "es_query": {"size": 10000}}, "data": ['
+    template = value2json(
+        {
+            "push": {"id": 0, "date": 1},
+            "branch": "autoland",
+            "task": {"id": 'abc"def', "tags": [{"name": "x", "value": 2}] * 10},
+            "run": {"timestamp": 1590000000.5, "logs": ['line "' + str(j) + '" ]}' for j in range(20)]},
+        }
+    ).replace("%", "%%").replace('"id":0', '"id":%d').replace('"date":1', '"date":%d').encode("utf8")
+    size = 0
+    i = 0
+    while size < megabytes * 1000 * 1000:
+        record = template % (i, 1590000000 + i)
+        if i:
+            yield b","
+        yield record
+        size += len(record)
+        i += 1
+    yield b"]}"
+
+
+def reader(chunks):
+    """
+    READ IN FIXED-SIZED BLOCKS, LIKE A NETWORK STREAM
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        pending.extend(chunk)
+        if len(pending) >= READ_SIZE:
+            yield bytes(pending)
+            pending = bytearray()
+    yield bytes(pending)
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [{"name": "--megabytes", "type": int, "default": 300, "dest": "megabytes"}]
+        )
+        Log.start()
+
+        start = time()
+        num = 0
+        for _ in stream.parse(
+            reader(response(settings.megabytes)),
+            "data",
+            {"data.push.id", "data.push.date", "data.branch"},
+        ):
+            num += 1
+        duration = time() - start
+
+        Log.note(
+            "{{num}} records in {{seconds|round(places=2)}}s ({{rate|round(places=1)}} MB/s), peak memory {{memory}}MB",
+            num=num,
+            seconds=duration,
+            rate=settings.megabytes / duration,
+            memory=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1000,
+        )
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
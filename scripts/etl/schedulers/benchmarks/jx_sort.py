@@ -0,0 +1,77 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR jx.sort() AND jx.groupby() ON MANY ROWS
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/jx_sort.py --num=1000000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from jx_python import jx
+from mo_logs import startup, Log
+from mo_math.randoms import Random
+from mo_threads import stop_main_thread
+from mo_times import Timer
+
+BRANCHES = ["autoland", "mozilla-central", "try", None]
+
+
+def check_mixed_ties():
+    """
+    LISTS HAVE NO SORT KEY, SO THIS SORT FALLS BACK TO value_compare() AFTER
+    THE push.id RUN HAS SORTED; ROWS THAT TIE ON ALL FIELDS KEEP THEIR ORDER
+    """
+    values = [3, "a", [1, 2], None, 1.5, [0], "b", 3]
+    rows = [
+        {"value": values[i % len(values)], "push": {"id": Random.int(3)}, "order": i}
+        for i in range(200)
+    ]
+    result = jx.sort(rows, ["value", {"push.id": "desc"}])
+    for prev, curr in zip(result, result[1:]):
+        if prev.value == curr.value and prev.push.id == curr.push.id and prev.order > curr.order:
+            Log.error("tie is out of order: {{prev}} before {{curr}}", prev=prev, curr=curr)
+    Log.note("mixed type sort keeps ties in order")
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [{"name": "--num", "type": int, "default": 100000, "dest": "num"}]
+        )
+        Log.start()
+
+        rows = [
+            {
+                "branch": Random.sample(BRANCHES, 1)[0],
+                "push": {"id": Random.int(settings.num)},
+                "duration": Random.float(1000) if Random.int(10) else None,
+            }
+            for _ in range(settings.num)
+        ]
+
+        with Timer("sort {{num}} rows by one field", {"num": settings.num}):
+            jx.sort(rows, "push.id")
+        with Timer("sort {{num}} rows by three fields, mixed direction", {"num": settings.num}):
+            jx.sort(rows, ["branch", {"push.id": "desc"}, "duration"])
+        with Timer("groupby {{num}} rows, sorted", {"num": settings.num}):
+            num = sum(1 for _ in jx.groupby(rows, ["branch", "push.id"]))
+        with Timer("groupby {{num}} rows, hashed", {"num": settings.num}):
+            num = sum(1 for _ in jx.groupby(rows, ["branch", "push.id"], ordered=False))
+        Log.note("{{num}} groups", num=num)
+
+        check_mixed_ties()
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR mo_logs TEMPLATE EXPANSION, AND THE COST OF Log.note() TO THE CALLER
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/log_templates.py --num=100000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import time
+
+from mo_logs import startup, Log
+from mo_logs.log_usingNothing import StructuredLogger
+from mo_logs.strings import expand_template
+from mo_threads import stop_main_thread
+
+TEMPLATE = "{{timestamp|datetime}} - Timer end  : {{num|comma}} rows for {{branch|quote}} (took {{duration|round(places=3)}})"
+
+
+class _Sink(StructuredLogger):
+    def write(self, template, params):
+        pass
+
+    def stop(self):
+        pass
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [{"name": "--num", "type": int, "default": 100000, "dest": "num"}]
+        )
+        Log.start()
+
+        start = time()
+        for i in range(settings.num):
+            expand_template(
+                TEMPLATE,
+                {"timestamp": 1590000000 + i, "num": i, "branch": "autoland", "duration": i / 7},
+            )
+        expand = time() - start
+
+        main_log, Log.main_log = Log.main_log, _Sink()
+        start = time()
+        for i in range(settings.num):
+            Log.note("push {{push|quote}} with {{num}} tasks", push=i, num=i)
+        note = time() - start
+        Log.main_log = main_log
+
+        Log.note(
+            "{{num}} expansions in {{expand|round(places=3)}}s; {{num}} Log.note() in {{note|round(places=3)}}s, without rendering",
+            num=settings.num,
+            expand=expand,
+            note=note,
+        )
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
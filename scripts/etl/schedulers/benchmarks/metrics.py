@@ -0,0 +1,70 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR THE COST OF ONE mo_times.metrics EVENT, AND A SAMPLE SUMMARY
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/metrics.py --num=1000000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import time
+
+from mo_json import value2json
+from mo_logs import startup, Log
+from mo_math.randoms import Random
+from mo_threads import stop_main_thread
+from mo_times.metrics import Metrics
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [{"name": "--num", "type": int, "default": 1000000, "dest": "num"}]
+        )
+        Log.start()
+        metrics = Metrics()
+        num = settings.num
+        durations = [Random.float(1) ** 3 for _ in range(1000)]
+
+        start = time()
+        for i in range(num):
+            pass
+        loop = time() - start
+
+        start = time()
+        for i in range(num):
+            metrics.count("bigquery rows", "schedulers")
+        count = time() - start - loop
+
+        start = time()
+        for i in range(num):
+            metrics.gauge("queue depth", i, "insert into schedulers")
+        gauge = time() - start - loop
+
+        start = time()
+        for i in range(num):
+            metrics.timing("get tasks for push", durations[i % 1000])
+        timing = time() - start - loop
+
+        Log.note(
+            "per event: count {{count|round(places=3)}}µs, gauge {{gauge|round(places=3)}}µs, timing {{timing|round(places=3)}}µs",
+            count=count * 1000000 / num,
+            gauge=gauge * 1000000 / num,
+            timing=timing * 1000000 / num,
+        )
+        Log.note("{{summary}}", summary=value2json(metrics.summary(), pretty=True))
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+BENCHMARK FOR mo_collections.PersistentQueue
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/persistent_queue.py --num=20000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import time, process_time
+
+from mo_collections.persistent_queue import PersistentQueue
+from mo_files import File
+from mo_logs import startup, Log
+from mo_threads import stop_main_thread
+from mo_times import Timer
+
+TIMEOUT = 0.5  # SECONDS FOR THE TIMED pop()
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [
+                {"name": "--num", "type": int, "default": 20000, "dest": "num"},
+                {"name": "--batch", "type": int, "default": 100, "dest": "batch"},
+                {"name": "--file", "type": str, "default": "results/benchmark_queue.json", "dest": "file"},
+            ]
+        )
+        Log.start()
+        File(settings.file).delete()
+        record = {"push": {"id": 1, "date": 1590000000}, "branch": "autoland", "tasks": ["a"] * 20}
+
+        queue = PersistentQueue(settings.file)
+        with Timer("add {{num}} records", {"num": settings.num}):
+            for i in range(settings.num):
+                queue.add(record)
+
+        with Timer("pop and commit {{num}} records, half of them", {"num": settings.num // 2}):
+            for i in range(settings.num // 2):
+                queue.pop()
+                if i % settings.batch == 0:
+                    queue.commit()
+            queue.commit()
+
+        # SIMULATE RESTART, WITHOUT close()
+        with Timer("restart with {{num}} records", {"num": settings.num - settings.num // 2}):
+            queue = PersistentQueue(settings.file)
+        Log.note("{{num}} records found after restart", num=len(queue))
+
+        with Timer("pop the rest"):
+            for _ in range(len(queue)):
+                queue.pop()
+            queue.commit()
+
+        # A TIMED pop() ON AN EMPTY QUEUE WAITS timeout, WITHOUT SPINNING
+        start, cpu = time(), process_time()
+        value = queue.pop(timeout=TIMEOUT)
+        waited, cpu = time() - start, process_time() - cpu
+        if value is not None or not TIMEOUT * 0.9 < waited < TIMEOUT * 3 or cpu > TIMEOUT / 2:
+            Log.error(
+                "pop(timeout={{timeout}}) returned {{value}} after {{waited}}s, using {{cpu}}s cpu",
+                timeout=TIMEOUT,
+                value=value,
+                waited=waited,
+                cpu=cpu,
+            )
+        queue.close()
+
+        # CLOSE WITH ITEMS LEFT, THEN RESTART
+        queue = PersistentQueue(settings.file)
+        queue.extend([record, record])
+        queue.pop()
+        queue.commit()
+        queue.close()
+        queue = PersistentQueue(settings.file)
+        if len(queue) != 1:
+            Log.error("expecting 1 record after close, not {{num}}", num=len(queue))
+        queue.pop()
+        queue.commit()
+        queue.close()
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+REPLAY PUSH FIXTURES THROUGH Schedulers.process(), WITH A FAKE mozci AND A
+FAKE BIGQUERY CLIENT, TO MEASURE THE ETL WITHOUT ActiveData, S3, TASKCLUSTER
+OR BIGQUERY
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/replay.py                        # SYNTHESIZE FIXTURE IF MISSING, COMPARE TO BASELINE
+    python3 benchmarks/replay.py --save                 # MAKE THIS RUN THE BASELINE
+    python3 benchmarks/replay.py --profile              # ALSO WRITE A cProfile TAB FILE
+    python3 benchmarks/replay.py --record --config=benchmarks/replay.json   # RECORD FIXTURE FROM mozci (NEEDS adr SETTINGS)
+
+THE FIXTURE, BASELINE, NUMBER OF PUSHES AND FAKE LATENCY ARE IN benchmarks/replay.json
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+import resource
+from time import time
+
+import fake_mozci
+import main as etl
+from fake_bigquery import FakeClient
+from fake_mozci import Fixture
+from mo_dots import Data, listwrap
+from mo_files import File
+from mo_json import json2value, value2json
+from mo_logs import constants, startup, Log
+from mo_threads import MAIN_THREAD, Signal
+from mo_times import Date, Duration
+from mo_times.metrics import metrics
+from pyLibrary.meta import extend
+
+HIGHER = "higher"  # BIGGER IS BETTER
+LOWER = "lower"  # SMALLER IS BETTER
+MEASURES = {
+    "records_per_second": HIGHER,
+    "encode_seconds": LOWER,
+    "insert_batches": LOWER,
+    "peak_rss_mb": LOWER,
+}
+
+
+def offline():
+    """
+    REPLACE THE Schedulers STATE, KEPT IN THE ADR CACHE, WITH NOTHING
+    """
+
+    @extend(etl.Schedulers)
+    def version(self, package):
+        return "replay"
+
+    @extend(etl.Schedulers)
+    def get_state(self):
+        return None
+
+    @extend(etl.Schedulers)
+    def set_state(self):
+        pass
+
+    @extend(etl.Schedulers)
+    def set_loaded(self):
+        pass
+
+
+def get_fixture(config):
+    fixture = File(config.fixture)
+    if config.args.record:
+        etl.setup(config)
+        pushes = fake_mozci.record(
+            etl.make_push_objects,
+            listwrap(config.branches),
+            Date(config.range.min),
+            Date(config.range.max),
+            Duration(config.interval),
+        )
+        fake_mozci.write(config.fixture, pushes)
+    elif not fixture.exists:
+        pushes = fake_mozci.synthesize(
+            listwrap(config.branches),
+            Date(config.range.min),
+            Date(config.range.max),
+            config.pushes,
+        )
+        fake_mozci.write(config.fixture, pushes)
+        Log.note("wrote {{num}} synthetic pushes to {{file}}", num=len(pushes), file=fixture.abspath)
+    return Fixture(fake_mozci.read(config.fixture))
+
+
+def replay(config, fixture):
+    client = FakeClient(latency=config.latency)
+    config.destination.client = client
+    etl.make_push_objects = fixture.make_push_objects
+    offline()
+
+    schedulers = etl.Schedulers(config)
+    metrics.clear()
+    start = time()
+    schedulers.process(Signal())
+    duration = time() - start
+
+    if client.rows != len(fixture):
+        Log.error("expecting {{expected}} records, not {{num}}", expected=len(fixture), num=client.rows)
+
+    histograms = {h["stage"]: h for h in metrics.summary()["histograms"] if "label" not in h}
+    return Data(
+        pushes=len(fixture),
+        records=client.rows,
+        seconds=duration,
+        records_per_second=client.rows / duration,
+        encode_seconds=histograms.get("encoding", {}).get("sum", 0),
+        insert_seconds=histograms.get("insert {{num}} rows to bq", {}).get("sum", 0),
+        insert_batches=client.inserts,
+        insert_bytes=client.bytes,
+        queries=client.queries,
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1000,
+    )
+
+
+def compare(result, baseline, tolerance):
+    """
+    :return: LIST OF MEASURES THAT ARE WORSE THAN baseline BY MORE THAN tolerance
+    """
+    regressions = []
+    for name, better in MEASURES.items():
+        expected = baseline[name]
+        actual = result[name]
+        if not expected:
+            continue
+        change = (actual - expected) / expected
+        if better == HIGHER:
+            change = -change
+        if change > tolerance:
+            regressions.append(name)
+            Log.warning(
+                "{{name}} regressed {{change|percent}}: {{actual}} (baseline {{expected}})",
+                name=name,
+                change=change,
+                actual=actual,
+                expected=expected,
+            )
+    return regressions
+
+
+def main():
+    try:
+        config = startup.read_settings(
+            defs=[
+                {"name": "--record", "action": "store_true", "dest": "record", "help": "record the fixture from mozci"},
+                {"name": "--save", "action": "store_true", "dest": "save", "help": "save this run as the baseline"},
+                {"name": "--profile", "action": "store_true", "dest": "profile", "help": "write a cProfile tab file"},
+            ],
+            default_filename="benchmarks/replay.json",
+        )
+        constants.set(config.constants)
+        if config.args.profile:
+            config.debug.cprofile = {"enabled": True, "filename": config.profile}
+        Log.start(config.debug)
+
+        fixture = get_fixture(config)
+        result = replay(config, fixture)
+        Log.note("replay result:\n{{result|json}}", result=result)
+
+        baseline = File(config.baseline)
+        if config.args.save:
+            baseline.write(value2json(result, pretty=True))
+            Log.note("baseline saved to {{file}}", file=baseline.abspath)
+        elif config.args.profile:
+            Log.note("profiled runs are slower, not compared to the baseline")
+        elif baseline.exists:
+            regressions = compare(result, json2value(baseline.read()), config.tolerance)
+            if regressions:
+                Log.error("{{num}} measures regressed: {{names}}", num=len(regressions), names=regressions)
+            Log.note("no regressions compared to {{file}}", file=baseline.abspath)
+    finally:
+        # STOPS LOGGING, AND WRITES THE PROFILE, IF ANY
+        MAIN_THREAD.stop()
+
+
+if __name__ == "__main__":
+    main()
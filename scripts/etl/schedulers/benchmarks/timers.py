@@ -0,0 +1,76 @@
+# encoding: utf-8
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+#
+# Contact: Kyle Lahnakoski (kyle@lahnakoski.com)
+#
+"""
+MICRO-BENCHMARK FOR THE Till DAEMON
+
+    export PYTHONPATH=.:vendor
+    python3 benchmarks/timers.py --num=100000
+"""
+from __future__ import division
+from __future__ import unicode_literals
+
+from time import time, process_time, sleep
+
+from mo_logs import startup, Log
+from mo_math.randoms import Random
+from mo_threads import Till, till, stop_main_thread
+
+
+def main():
+    try:
+        settings = startup.argparse(
+            [
+                {"name": "--num", "type": int, "default": 100000, "dest": "num"},
+                {"name": "--spread", "type": float, "default": 2, "dest": "spread"},
+            ]
+        )
+        Log.start()
+
+        # MANY PENDING TIMERS, SPREAD OVER spread SECONDS
+        start = time()
+        deadlines = [start + Random.float(settings.spread) for _ in range(settings.num)]
+        timers = [Till(till=d) for d in deadlines]
+        created = time() - start
+        Log.note(
+            "{{num}} timers created in {{seconds|round(places=3)}}s ({{pending}} pending)",
+            num=settings.num,
+            seconds=created,
+            pending=till.stats.pending,
+        )
+
+        cpu = process_time()
+        for t in timers:
+            t.wait()
+        end = time()
+        cpu = process_time() - cpu
+
+        # ABANDONED TIMERS MUST NOT ACCUMULATE
+        for _ in range(settings.num):
+            Till(seconds=3600)
+        sleep(0.1)  # LET THE DAEMON FINISH ITS LAST PURGE, WITHOUT WAKING IT
+        if till.stats.pending > 2 * till.MIN_PURGE:
+            Log.error(
+                "{{pending}} timers pending after {{num}} were abandoned",
+                pending=till.stats.pending,
+                num=settings.num,
+            )
+
+        Log.note(
+            "all fired {{seconds|round(places=3)}}s after last deadline, using {{cpu|round(places=3)}}s cpu\n{{stats|json}}",
+            seconds=end - max(deadlines),
+            cpu=cpu,
+            stats=till.stats,
+        )
+    finally:
+        stop_main_thread()
+        Log.stop()
+
+
+if __name__ == "__main__":
+    main()
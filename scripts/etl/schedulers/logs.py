@@ -26,8 +26,9 @@ def capture_loguru():
     CAPTURE LOGGING FROM loguru
     """
     loguru.logger.remove()
+    # loguru DOES NOT FORMAT MESSAGES BELOW level
     loguru.logger.add(
-        _loguru_emit, level="DEBUG", format="{message}", filter=lambda r: True,
+        _loguru_emit, level=LOG_LEVEL, format="{message}", filter=lambda r: True,
     )
 
 
@@ -36,7 +37,8 @@ def capture_logging():
     CAPTURE LOGGING FROM PYTHON LOGGING
     """
     logger = logging.getLogger()
-    logger.setLevel(level=logging.NOTSET)
+    # RECORDS BELOW level ARE NOT CREATED, OR FORMATTED
+    logger.setLevel(level=LOG_LEVEL)
     logger.addHandler(_LogHanlder(logger))
 
 
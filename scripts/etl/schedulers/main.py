@@ -31,11 +31,14 @@ from mo_dots import (
     concat_field,
     set_default,
 )
+from mo_future import text
 from mo_json import value2json, json2value
-from mo_logs import startup, constants, Log
-from mo_threads import Process, Till
+from mo_logs import startup, constants, Log, Except
+from mo_threads import Lock, Process, Till, Queue, Thread, THREAD_STOP
+from mo_threads.metrics import MetricsWriter
 from mo_threads.repeat import Repeat
 from mo_times import Date, Duration, Timer, MINUTE
+from mo_times.metrics import metrics
 from pyLibrary.env import git
 from pyLibrary.meta import extend
 
@@ -43,9 +46,15 @@ MAX_RUNTIME = "50minute"  # STOP PROCESSING AFTER THIS GIVEN TIME
 DEFAULT_START = "today-2day"
 LOOK_BACK = 30
 LOOK_FORWARD = 30
+DEFAULT_WORKERS = 1  # NUMBER OF THREADS USED TO GET PUSH DETAILS
+INSERT_BATCH_SIZE = 1000  # MAX RECORDS SENT TO BIGQUERY AT ONCE
+INSERT_PERIOD = 60  # MAX SECONDS TO HOLD RECORDS BEFORE SENDING TO BIGQUERY
 CACHY_STATE = "cia-tasks/etl/schedules"
+CACHY_LOADED = "cia-tasks/etl/schedules/loaded"  # push.id ALREADY IN destination
 CACHY_RETENTION = Duration("30day") / MINUTE
 SHOW_S3_CACHE_HIT = True
+STARTED = "started"  # INTERVAL CHECKPOINT STATUS
+DONE = "done"  # INTERVAL CHECKPOINT STATUS
 SECRET_PREFIX = "project/cia/smart-scheduling"
 SECRET_NAMES = [
     "destination.account_info",
@@ -79,11 +88,14 @@ class Schedulers:
         config.start = Date(config.start)
         config.interval = Duration(config.interval)
         config.branches = listwrap(config.branches)
+        config.workers = coalesce(config.workers, DEFAULT_WORKERS)
         self.destination = bigquery.Dataset(config.destination).get_or_create_table(
             config.destination
         )
 
         # CALCULATE THE PREVIOUS RUN
+        self.state_locker = Lock("etl state")
+        self.checkpoints = {}  # MAP FROM checkpoint_key() TO INTERVAL PROGRESS
         mozci_version = self.version("mozci")
         prev_done = self.get_state()
         if prev_done and prev_done.mozci_version == mozci_version:
@@ -92,6 +104,10 @@ class Schedulers:
                 min=Date(coalesce(prev_done.min, config.start, "today-2day")),
                 max=Date(coalesce(prev_done.max, config.start, "today-2day")),
             )
+            oldest = config.range.min - config.interval
+            for key, checkpoint in prev_done.intervals.items():
+                if Date(checkpoint.start) >= oldest:
+                    self.checkpoints[key] = checkpoint
         else:
             self.done = Data(
                 mozci_version=mozci_version,
@@ -99,6 +115,7 @@ class Schedulers:
                 max=Date(coalesce(config.start, "today-2day")),
             )
             self.set_state()
+        self.loaded = self.get_loaded()
 
     def get_state(self):
         try:
@@ -109,7 +126,55 @@ class Schedulers:
             return None
 
     def set_state(self):
-        adr_configuration.config.cache.put(CACHY_STATE, value2json(self.done), minutes=CACHY_RETENTION)
+        with self.state_locker:
+            state = value2json(set_default({"intervals": self.checkpoints}, self.done))
+        adr_configuration.config.cache.put(CACHY_STATE, state, minutes=CACHY_RETENTION)
+
+    def get_loaded(self):
+        """
+        :return: SET OF push.id ALREADY IN destination FOR THIS mozci_version
+        """
+        mozci_version = self.done.mozci_version
+        try:
+            loaded = self.destination.distinct(
+                ["push.id", "etl.mozci_version"],
+                since=self.config.range.min - self.config.interval,
+            )
+            pushes = set(
+                push_id for push_id, version in loaded if version == mozci_version
+            )
+            Log.note("{{num}} pushes already loaded", num=len(pushes))
+            return pushes
+        except Exception as e:
+            Log.warning("Can not read loaded pushes, using local cache", cause=e)
+
+        try:
+            loaded = json2value(adr_configuration.config.cache.get(CACHY_LOADED))
+            if loaded.mozci_version == mozci_version:
+                return set(loaded.pushes)
+        except Exception:
+            pass
+        return set()
+
+    def set_loaded(self):
+        with self.state_locker:
+            loaded = value2json(
+                {"mozci_version": self.done.mozci_version, "pushes": sorted(self.loaded)}
+            )
+        adr_configuration.config.cache.put(CACHY_LOADED, loaded, minutes=CACHY_RETENTION)
+
+    def get_checkpoint(self, start, branch):
+        """
+        :return: THE PROGRESS OF THE INTERVAL STARTING AT start ON branch
+        """
+        key = checkpoint_key(start, branch)
+        with self.state_locker:
+            checkpoint = self.checkpoints.get(key)
+            if checkpoint is None:
+                checkpoint = self.checkpoints[key] = Data(
+                    branch=branch, start=start, status=None, pushes=0, last_push=None
+                )
+        return checkpoint
 
     def version(self, package):
         with Process("", ["pip", "show", package]) as p:
@@ -118,11 +183,16 @@ class Schedulers:
                     return line[9:].strip()
             return None
 
-    def process_one(self, start, end, branch, please_stop):
-        # ASSUME PREVIOUS WORK IS DONE
+    def process_one(self, start, end, branch, sink, please_stop):
+        checkpoint = self.get_checkpoint(start, branch)
+        if checkpoint.status == DONE:
+            return
+
+        # ASSUME PREVIOUS WORK IS DONE, THE checkpoint WILL TELL US OTHERWISE
         # UPDATE THE DATABASE STATE
         self.done.min = mo_math.min(end, self.done.min)
         self.done.max = mo_math.max(start, self.done.max)
+        checkpoint.status = STARTED
         self.set_state()
 
         try:
@@ -130,6 +200,10 @@ class Schedulers:
                 from_date=start.format(), to_date=end.format(), branch=branch
             )
         except MissingDataError:
+            # NOTHING TO LOAD, DO NOT LEAVE THE INTERVAL STARTED
+            with self.state_locker:
+                checkpoint.status = DONE
+            self.set_state()
             return
         except Exception as e:
             raise Log.error("not expected", cause=e)
@@ -141,69 +215,153 @@ class Schedulers:
             end=end,
             branch=branch,
         )
+        loaded = [p for p in pushes if p.id in self.loaded]
+        if loaded:
+            pushes = [p for p in pushes if p.id not in self.loaded]
+            Log.note("Skip {{num}} pushes already loaded", num=len(loaded))
+        if checkpoint.last_push != None:
+            pushes = [p for p in pushes if p.id > checkpoint.last_push]
+            Log.note(
+                "Resume after push {{push}}, {{num}} pushes remaining",
+                push=checkpoint.last_push,
+                num=len(pushes),
+            )
 
-        data = []
-        try:
+        def progress(push_id):
+            # CALLED ONLY ONCE THIS PUSH'S RECORDS, AND ALL BEFORE THEM, ARE IN BIGQUERY
+            def checkpoint_push():
+                with self.state_locker:
+                    checkpoint.pushes += 1
+                    checkpoint.last_push = push_id
+                    self.loaded.add(push_id)
+            return checkpoint_push
+
+        def checkpoint_done():
+            with self.state_locker:
+                checkpoint.status = DONE
+            self.set_state()
+
+        # sink INSERTS INTO BIGQUERY WHILE WE CONTINUE TO EXTRACT
+        num = 0
+        for record in self.get_records(pushes, branch, please_stop):
+            sink.add(record)
+            sink.add(progress(record["push"]["id"]))
+            num += 1
+        if num == len(pushes):
+            sink.add(checkpoint_done)
+
+    def get_records(self, pushes, branch, please_stop):
+        """
+        GENERATE ONE RECORD PER PUSH, IN PUSH ORDER
+        :param pushes: LIST OF PUSH OBJECTS
+        :param branch: NAME OF THE BRANCH THE PUSHES BELONG TO
+        :param please_stop: SIGNAL TO STOP EARLY
+        """
+        num_workers = mo_math.min(self.config.workers, len(pushes))
+        if num_workers <= 1:
             for push in pushes:
                 if please_stop:
                     break
+                yield self.get_record(push, branch)
+            return
 
-                with Timer("get tasks for push {{push}}", {"push": push.id}):
-                    try:
-                        schedulers = [
-                            label.split("shadow-scheduler-")[1]
-                            for label in push.scheduled_task_labels
-                            if "shadow-scheduler" in label
-                        ]
-                    except Exception as e:
-                        Log.warning("could not get schedulers", cause=e)
-                        schedulers = []
-
-                    scheduler = []
-                    for s in schedulers:
-                        try:
-                            scheduler.append(
-                                {
-                                    "name": s,
-                                    "tasks": jx.sort(
-                                        push.get_shadow_scheduler_tasks(s)
-                                    ),
-                                }
-                            )
-                        except Exception:
-                            pass
+        # FAN THE PUSHES OUT TO WORKERS, COLLECT RESULTS BY INDEX
+        todo = Queue("pushes for " + branch, max=len(pushes) + 1, silent=True)
+        todo.extend(enumerate(pushes))
+        todo.add(THREAD_STOP)
+        done = Queue("records for " + branch, max=len(pushes) + 1, silent=True)
+
+        def worker(please_stop):
+            while not please_stop:
+                item = todo.pop()
+                if item is THREAD_STOP:
+                    break
+                i, push = item
                 try:
-                    regressions = push.get_regressions("label").keys()
+                    done.add((i, self.get_record(push, branch)))
                 except Exception as e:
-                    regressions = []
-                    Log.warning(
-                        "could not get regressions for {{push}}", push=push.id, cause=e
-                    )
+                    done.add((i, Except.wrap(e)))
 
-                # RECORD THE PUSH
-                data.append(
-                    {
-                        "push": {
-                            "id": push.id,
-                            "date": push.date,
-                            "changesets": push.revs,
-                            "backedoutby": push.backedoutby,
-                        },
-                        "schedulers": scheduler,
-                        "regressions": [
-                            {"label": name} for name in jx.sort(regressions)
-                        ],
-                        "branch": branch,
-                        "etl": {
-                            "revision": git.get_revision(),
-                            "timestamp": Date.now(),
-                        },
-                    }
-                )
+        workers = [
+            Thread.run("get records " + text(w), worker) for w in range(num_workers)
+        ]
+        try:
+            pending = {}
+            next_index = 0
+            while next_index < len(pushes) and not please_stop:
+                item = done.pop(till=please_stop)
+                metrics.gauge("queue depth", len(done), done.name)
+                if item is None:
+                    continue
+                i, record = item
+                pending[i] = record
+                while next_index in pending:
+                    record = pending.pop(next_index)
+                    next_index += 1
+                    if isinstance(record, Except):
+                        raise record
+                    yield record
         finally:
-            # ADD WHATEVER WE HAVE
-            with Timer("adding {{num}} records to bigquery", {"num": len(data)}):
-                self.destination.extend(data)
+            for w in workers:
+                w.stop()
+            for w in workers:
+                w.join()
+
+    def get_record(self, push, branch):
+        """
+        :return: THE RECORD FOR GIVEN push
+        """
+        with Timer("get tasks for push {{push}}", {"push": push.id}):
+            try:
+                schedulers = [
+                    label.split("shadow-scheduler-")[1]
+                    for label in push.scheduled_task_labels
+                    if "shadow-scheduler" in label
+                ]
+            except Exception as e:
+                Log.warning("could not get schedulers", cause=e)
+                schedulers = []
+
+            scheduler = []
+            for s in schedulers:
+                try:
+                    scheduler.append(
+                        {
+                            "name": s,
+                            "tasks": jx.sort(
+                                push.get_shadow_scheduler_tasks(s)
+                            ),
+                        }
+                    )
+                except Exception:
+                    pass
+        try:
+            regressions = push.get_regressions("label").keys()
+        except Exception as e:
+            regressions = []
+            Log.warning(
+                "could not get regressions for {{push}}", push=push.id, cause=e
+            )
+
+        # RECORD THE PUSH
+        return {
+            "push": {
+                "id": push.id,
+                "date": push.date,
+                "changesets": push.revs,
+                "backedoutby": push.backedoutby,
+            },
+            "schedulers": scheduler,
+            "regressions": [
+                {"label": name} for name in jx.sort(regressions)
+            ],
+            "branch": branch,
+            "etl": {
+                "revision": git.get_revision(),
+                "mozci_version": self.done.mozci_version,
+                "timestamp": Date.now(),
+            },
+        }
 
     def process(self, please_stop):
         done = self.done
@@ -228,15 +386,131 @@ class Schedulers:
                     self.todo.append((start, end, branch))
                 end = start
 
+        # REPORT, AND RESUME, THE INTERVALS THAT DID NOT FINISH
+        gaps = sorted(
+            (c for c in self.checkpoints.values() if c.status != DONE),
+            key=lambda c: Date(c.start),
+        )
+        if gaps:
+            Log.note(
+                "{{num}} intervals did not finish: {{gaps|json}}",
+                num=len(gaps),
+                gaps=[{"branch": c.branch, "start": Date(c.start).format()} for c in gaps],
+            )
+        self.todo = [
+            (Date(c.start), Date(c.start) + config.interval, c.branch) for c in gaps
+        ] + [
+            (start, end, branch)
+            for start, end, branch in self.todo
+            if checkpoint_key(start, branch) not in self.checkpoints
+        ]
+
         try:
-            for start, end, branch in self.todo:
-                if please_stop:
-                    break
-                self.process_one(start, end, branch, please_stop)
+            with self.destination.threaded_queue(
+                batch_size=INSERT_BATCH_SIZE, period=INSERT_PERIOD, silent=True
+            ) as sink:
+                for start, end, branch in self.todo:
+                    if please_stop:
+                        break
+                    self.process_one(start, end, branch, sink, please_stop)
         except Exception as e:
             Log.warning("Could not complete the etl", cause=e)
         else:
             self.destination.merge_shards()
+        finally:
+            # RECORD THE PROGRESS OF THE LAST INTERVAL
+            self.set_state()
+            self.set_loaded()
+
+    def write_metrics(self, summary):
+        """
+        ADD ONE etl.metrics RECORD TO THE metrics TABLE, IN THE SAME DATASET AS destination
+        """
+        config = self.config
+        table = bigquery.Dataset(config.destination).get_or_create_table(
+            table=config.metrics.table,
+            schema={"etl.timestamp._t_": "time"},
+            top_level_fields={"etl.timestamp": "_etl_timestamp"},
+            partition={"field": "etl.timestamp", "expire": "2year"},
+            sharded=True,
+        )
+        table.extend(
+            [
+                {
+                    "etl": {
+                        "revision": git.get_revision(),
+                        "mozci_version": self.done.mozci_version,
+                        "timestamp": Date.now(),
+                        "metrics": summary,
+                    }
+                }
+            ]
+        )
+        # ONE SMALL SHARD PER RUN, MERGE THEM
+        table.merge_shards()
+
+
+def checkpoint_key(start, branch):
+    return branch + "/" + text(int(start.unix))
+
+
+def setup(config):
+    """
+    SEND ALL LOGGING TO MAIN LOGGING, AND CONFIGURE ADR, SO mozci IS READY TO USE
+    :param config: CONFIG DATA
+    """
+    # SHUNT PYTHON LOGGING TO MAIN LOGGING
+    capture_logging()
+    # SHUNT ADR LOGGING TO MAIN LOGGING
+    # https://loguru.readthedocs.io/en/stable/api/logger.html#loguru._logger.Logger.add
+    capture_loguru()
+
+    if config.taskcluster:
+        inject_secrets(config)
+
+    @extend(Configuration)
+    def update(self, config):
+        """
+        Update the configuration object with new parameters
+        :param config: dict of configuration
+        """
+        for k, v in config.items():
+            if v != None:
+                self._config[k] = v
+
+        self._config["sources"] = sorted(
+            map(os.path.expanduser, set(self._config["sources"]))
+        )
+
+        # Use the NullStore by default. This allows us to control whether
+        # caching is enabled or not at runtime.
+        self._config["cache"].setdefault("stores", {"null": {"driver": "null"}})
+        object.__setattr__(self, "cache", CustomCacheManager(self._config))
+        for _, store in self._config["cache"]["stores"].items():
+            if store.path and not store.path.endswith("/"):
+                # REQUIRED, OTHERWISE FileStore._create_cache_directory() WILL LOOK AT PARENT DIRECTORY
+                store.path = store.path + "/"
+
+    if SHOW_S3_CACHE_HIT:
+        s3_get = S3Store._get
+        @extend(S3Store)
+        def _get(self, key):
+            with Timer("get {{key}} from S3", {"key": key}, verbose=False) as timer:
+                output = s3_get(self, key)
+                if output is not None:
+                    timer.verbose = True
+                    metrics.count("s3 cache", "hit")
+                else:
+                    metrics.count("s3 cache", "miss")
+                return output
+
+    # UPDATE ADR CONFIGURATION
+    with Repeat("waiting for ADR", every="10second"):
+        adr.config.update(config.adr)
+        # DUMMY TO TRIGGER CACHE
+        make_push_objects(
+            from_date=Date.today().format(), to_date=Date.now().format(), branch="autoland"
+        )
 
 
 def main():
@@ -244,60 +518,16 @@ def main():
         config = startup.read_settings()
         constants.set(config.constants)
         Log.start(config.debug)
-
-        # SHUNT PYTHON LOGGING TO MAIN LOGGING
-        capture_logging()
-        # SHUNT ADR LOGGING TO MAIN LOGGING
-        # https://loguru.readthedocs.io/en/stable/api/logger.html#loguru._logger.Logger.add
-        capture_loguru()
-
-        if config.taskcluster:
-           inject_secrets(config)
-
-        @extend(Configuration)
-        def update(self, config):
-            """
-            Update the configuration object with new parameters
-            :param config: dict of configuration
-            """
-            for k, v in config.items():
-                if v != None:
-                    self._config[k] = v
-
-            self._config["sources"] = sorted(
-                map(os.path.expanduser, set(self._config["sources"]))
-            )
-
-            # Use the NullStore by default. This allows us to control whether
-            # caching is enabled or not at runtime.
-            self._config["cache"].setdefault("stores", {"null": {"driver": "null"}})
-            object.__setattr__(self, "cache", CustomCacheManager(self._config))
-            for _, store in self._config["cache"]["stores"].items():
-                if store.path and not store.path.endswith("/"):
-                    # REQUIRED, OTHERWISE FileStore._create_cache_directory() WILL LOOK AT PARENT DIRECTORY
-                    store.path = store.path + "/"
-
-        if SHOW_S3_CACHE_HIT:
-            s3_get = S3Store._get
-            @extend(S3Store)
-            def _get(self, key):
-                with Timer("get {{key}} from S3", {"key": key}, verbose=False) as timer:
-                    output = s3_get(self, key)
-                    if output is not None:
-                        timer.verbose = True
-                    return output
-
-        # UPDATE ADR CONFIGURATION
-        with Repeat("waiting for ADR", every="10second"):
-            adr.config.update(config.adr)
-            # DUMMY TO TRIGGER CACHE
-            make_push_objects(
-                from_date=Date.today().format(), to_date=Date.now().format(), branch="autoland"
-            )
+        setup(config)
 
         outatime = Till(seconds=Duration(MAX_RUNTIME).total_seconds())
         outatime.then(lambda: Log.alert("Out of time, exit early"))
-        Schedulers(config).process(outatime)
+        schedulers = Schedulers(config)
+        every = Duration(config.metrics.every).seconds if config.metrics.every else None
+        with MetricsWriter(config.metrics.filename, every=every) as writer:
+            schedulers.process(outatime)
+        if config.metrics.table:
+            schedulers.write_metrics(writer.summary)
     except Exception as e:
         Log.warning("Problem with etl! Shutting down.", cause=e)
     finally: